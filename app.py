@@ -1,7 +1,14 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import xlsxwriter
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from io import BytesIO
-import json
+import re
+import sys
+import uuid
 from datetime import datetime
 
 # Page config
@@ -42,8 +49,11 @@ st.markdown("""
 # Initialize session state
 if 'custom_handles' not in st.session_state:
     st.session_state['custom_handles'] = []
-if 'vpas' not in st.session_state:
-    st.session_state['vpas'] = []
+if 'vpas_phone' not in st.session_state:
+    st.session_state['vpas_phone'] = np.empty(0, dtype=object)
+    st.session_state['vpas_handle'] = np.empty(0, dtype=object)
+    st.session_state['vpa_format'] = None
+    st.session_state['vpa_token'] = None
 if 'history' not in st.session_state:
     st.session_state['history'] = []
 
@@ -60,25 +70,84 @@ DEFAULT_HANDLES = [
     'rbl', 'scb', 'synb', 'tjsb', 'uco',
     'unionbankofindia', 'united', 'vijb', 'yesbank', 'postbank'
 ]
+DEFAULT_HANDLE_SET = frozenset(DEFAULT_HANDLES)
+
+# Handle categories for the sidebar quick-select
+_EXCLUDE = frozenset({'paytm', 'ybl', 'airtel', 'jio'})
+CATEGORIES = {
+    "Popular Banks": ('ybl', 'paytm', 'okaxis', 'oksbi', 'okicici', 'okhdfc'),
+    "Payment Apps": ('paytm', 'ybl', 'airtel', 'jio', 'jupiter'),
+    "All Banks": tuple(h for h in DEFAULT_HANDLES if h not in _EXCLUDE)
+}
+
+# VPA format placeholders; the default format is used when no custom one is set
+DEFAULT_VPA_FORMAT = '{number}@{handle}'
+FORMAT_PLACEHOLDER_RE = re.compile(r'(\{number\}|\{handle\})')
+
+# Exactly ten ASCII digits; re.ASCII keeps \d from matching other scripts' digits
+PHONE_RE = re.compile(r'\d{10}', re.ASCII)
+
+# First comma-separated field of every line in an uploaded file, trimmed of all whitespace
+# like str.strip ([^\S\n] is any whitespace except the line break)
+UPLOAD_FIELD_RE = re.compile(r'^[^\S\n]*([^,\n]*?)[^\S\n]*(?:,|$)', re.MULTILINE)
+
+# Dummy numbers commonly left in sample files
+PLACEHOLDER_NUMBERS = frozenset({'0000000000', '0123456789', '1234567890', '9999999999'})
 
 def validate_phone_number(number):
     """Validate if the number is a 10-digit phone number"""
-    number = str(number).strip()
-    return len(number) == 10 and number.isdigit()
-
-def generate_vpas(phone_numbers, selected_handles, custom_format=None):
-    """Generate VPA combinations with optional custom format"""
-    vpas = []
-    for number in phone_numbers:
-        if validate_phone_number(number):
-            for handle in selected_handles:
-                if custom_format:
-                    vpa = custom_format.replace('{number}', number).replace('{handle}', handle)
-                else:
-                    vpa = f"{number}@{handle}"
-                vpas.append(vpa)
+    return PHONE_RE.fullmatch(str(number).strip()) is not None
+
+def validate_batch(phone_numbers):
+    """Strip a batch of phone numbers and return them with a mask marking the 10-digit ones"""
+    numbers = np.asarray([str(num).strip() for num in phone_numbers], dtype=object)
+    valid_mask = np.fromiter(
+        (PHONE_RE.fullmatch(num) is not None for num in numbers),
+        dtype=bool, count=len(numbers)
+    )
+    return numbers, valid_mask
+
+def generate_vpas(valid_numbers, selected_handles):
+    """Generate every phone x handle combination of already-validated numbers as parallel arrays"""
+    # The full VPA strings are only rendered when a view needs them
+    phones = np.asarray(valid_numbers, dtype=object)
+    # Interned handles let every row of a handle share one string object
+    handles = np.asarray([sys.intern(h) for h in selected_handles], dtype=object)
+    return np.repeat(phones, len(handles)), np.tile(handles, len(phones))
+
+def apply_affixes(custom_format, prefix, suffix):
+    """Fold the phone number prefix/suffix into the VPA format"""
+    if not (prefix or suffix):
+        return custom_format
+    return (custom_format or DEFAULT_VPA_FORMAT).replace('{number}', prefix + '{number}' + suffix)
+
+def render_vpas(phones, handles, custom_format=None):
+    """Join parallel phone and handle arrays into full VPAs with optional custom format"""
+    columns = {
+        '{number}': np.asarray(phones, dtype=object),
+        '{handle}': np.asarray(handles, dtype=object)
+    }
+    # Split the format once into literal fragments and placeholders, then add them column-wise
+    tokens = FORMAT_PLACEHOLDER_RE.split(custom_format or DEFAULT_VPA_FORMAT)
+    vpas = np.full(len(columns['{number}']), tokens[0], dtype=object)
+    for placeholder, literal in zip(tokens[1::2], tokens[2::2]):
+        vpas = vpas + columns[placeholder]
+        if literal:
+            vpas = vpas + literal
     return vpas
 
+@st.cache_data(max_entries=8)
+def _gen_cached(valid_numbers, selected_handles, vpa_format, remove_duplicates):
+    """Generate the unsorted phone and handle arrays and unique count for one set of inputs"""
+    phones, handles = generate_vpas(valid_numbers, selected_handles)
+    
+    # Remove duplicates
+    duplicated = pd.Series(render_vpas(phones, handles, vpa_format)).duplicated().to_numpy()
+    if remove_duplicates:
+        phones, handles = phones[~duplicated], handles[~duplicated]
+        return phones, handles, len(phones)
+    return phones, handles, len(phones) - int(duplicated.sum())
+
 def save_to_history(phone_numbers, handles, vpas_count):
     """Save generation to history"""
     st.session_state['history'].append({
@@ -88,6 +157,90 @@ def save_to_history(phone_numbers, handles, vpas_count):
         'vpas_count': vpas_count
     })
 
+def sort_vpas(phones, handles, custom_format, sort_option):
+    """Order parallel phone and handle arrays by phone number, handle or full VPA"""
+    if sort_option == "By Phone Number":
+        keys = phones
+    elif sort_option == "By Handle":
+        keys = handles
+    elif sort_option == "Alphabetically":
+        keys = render_vpas(phones, handles, custom_format)
+    else:
+        return phones, handles
+    
+    order = np.argsort(np.asarray(keys, dtype=str), kind='stable')
+    return phones[order], handles[order]
+
+def search_vpas(vpas, search_term, cache_key):
+    """Return the VPAs containing search_term, narrowing the previous match when the term was extended"""
+    term = search_term.lower()
+    last_term, last_matches = st.session_state.get(cache_key, ('', None))
+    if last_matches is not None and term.startswith(last_term):
+        candidates = last_matches
+    else:
+        candidates = range(len(vpas))
+    matches = [i for i in candidates if term in vpas[i].lower()]
+    st.session_state[cache_key] = (term, matches)
+    return [vpas[i] for i in matches]
+
+# The builders below are keyed on the generation token and format; the underscore-prefixed
+# arrays are not hashed by st.cache_data, so a cache hit costs O(1) instead of O(N)
+@st.cache_data(max_entries=8)
+def build_vpa_list(vpa_token, _phones, _handles, custom_format=None):
+    """Render the full VPA strings for one generation's phone and handle arrays"""
+    return render_vpas(_phones, _handles, custom_format).tolist()
+
+@st.cache_data(max_entries=8)
+def build_vpa_df(vpa_token, _phones, _handles, custom_format=None):
+    """Build the Phone Number / UPI Handle / Full VPA table for one generation's phone and handle arrays"""
+    # Handles repeat across every phone, so store them as categorical codes
+    codes, uniques = pd.factorize(np.asarray(_handles, dtype=object))
+    return pd.DataFrame({
+        'Phone Number': pd.array(_phones, dtype='string'),
+        'UPI Handle': pd.Categorical.from_codes(codes, categories=uniques),
+        'Full VPA': pd.array(render_vpas(_phones, _handles, custom_format), dtype='string')
+    })
+
+@st.cache_data(max_entries=8)
+def build_txt_bytes(vpa_token, _phones, _handles, custom_format=None):
+    """Serialize one generation's phone and handle arrays to newline-separated text"""
+    return '\n'.join(build_vpa_list(vpa_token, _phones, _handles, custom_format)).encode('utf-8')
+
+@st.cache_data(max_entries=8)
+def build_csv_bytes(vpa_token, _phones, _handles, custom_format=None):
+    """Serialize one generation's phone and handle arrays to CSV"""
+    table = pa.table({
+        'phone_number': pa.array(_phones, type=pa.string()),
+        'upi_handle': pa.array(_handles, type=pa.string()),
+        'full_vpa': pa.array(render_vpas(_phones, _handles, custom_format), type=pa.string())
+    })
+    csv_buffer = pa.BufferOutputStream()
+    pacsv.write_csv(table, csv_buffer)
+    return csv_buffer.getvalue().to_pybytes()
+
+@st.cache_data(max_entries=8)
+def build_excel_bytes(vpa_token, _phones, _handles, custom_format=None):
+    """Serialize one generation's phone and handle arrays to an Excel workbook"""
+    df = build_vpa_df(vpa_token, _phones, _handles, custom_format)
+    excel_buffer = BytesIO()
+    # constant_memory flushes each row once the next one starts, so rows must be written in order
+    workbook = xlsxwriter.Workbook(excel_buffer, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('VPAs')
+    worksheet.write_row(0, 0, ['phone_number', 'upi_handle', 'full_vpa'])
+    for row, values in enumerate(df.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row, 0, values)
+    workbook.close()
+    return excel_buffer.getvalue()
+
+@st.cache_data(max_entries=8)
+def build_json_bytes(vpa_token, _phones, _handles, custom_format=None):
+    """Serialize one generation's phone and handle arrays to JSON"""
+    return orjson.dumps({
+        'generated_at': datetime.now().isoformat(),
+        'total_vpas': len(_phones),
+        'vpas': build_vpa_list(vpa_token, _phones, _handles, custom_format)
+    })
+
 # Header
 st.markdown('<div class="main-header"><h1>💳 UPI VPA Generator Pro</h1><p>Advanced VPA Generation with Custom TPAPs</p></div>', unsafe_allow_html=True)
 
@@ -108,17 +261,11 @@ with st.sidebar:
             selected_handles = DEFAULT_HANDLES.copy()
         else:
             # Category-wise selection
-            categories = {
-                "Popular Banks": ['ybl', 'paytm', 'okaxis', 'oksbi', 'okicici', 'okhdfc'],
-                "Payment Apps": ['paytm', 'ybl', 'airtel', 'jio', 'jupiter'],
-                "All Banks": [h for h in DEFAULT_HANDLES if h not in ['paytm', 'ybl', 'airtel', 'jio']]
-            }
-            
-            category = st.selectbox("Choose Category:", list(categories.keys()))
+            category = st.selectbox("Choose Category:", list(CATEGORIES.keys()))
             selected_handles = st.multiselect(
                 "Select Handles:",
                 options=DEFAULT_HANDLES,
-                default=categories[category]
+                default=list(CATEGORIES[category])
             )
         
         # Add custom handles to selection
@@ -138,7 +285,8 @@ with st.sidebar:
         col1, col2 = st.columns(2)
         with col1:
             if st.button("➕ Add", use_container_width=True):
-                if new_handle and new_handle not in DEFAULT_HANDLES and new_handle not in st.session_state['custom_handles']:
+                existing = set(st.session_state['custom_handles']) | DEFAULT_HANDLE_SET
+                if new_handle and new_handle not in existing:
                     st.session_state['custom_handles'].append(new_handle)
                     st.success(f"Added: {new_handle}")
                     st.rerun()
@@ -163,12 +311,14 @@ with st.sidebar:
         if st.button("📥 Add Bulk", use_container_width=True):
             if bulk_handles:
                 new_handles = [h.strip() for h in bulk_handles.split('\n') if h.strip()]
-                added = 0
+                existing = set(st.session_state['custom_handles']) | DEFAULT_HANDLE_SET
+                new_custom = []
                 for h in new_handles:
-                    if h not in DEFAULT_HANDLES and h not in st.session_state['custom_handles']:
-                        st.session_state['custom_handles'].append(h)
-                        added += 1
-                st.success(f"Added {added} new handles")
+                    if h not in existing:
+                        existing.add(h)
+                        new_custom.append(h)
+                st.session_state['custom_handles'] = st.session_state['custom_handles'] + new_custom
+                st.success(f"Added {len(new_custom)} new handles")
                 st.rerun()
         
         # Display custom handles
@@ -183,12 +333,17 @@ with st.sidebar:
     
     with tab3:
         st.subheader("Generation History")
-        if st.session_state['history']:
-            for i, record in enumerate(reversed(st.session_state['history'][-5:])):
-                with st.expander(f"#{len(st.session_state['history'])-i} - {record['timestamp']}"):
-                    st.write(f"📱 Phones: {record['phone_count']}")
-                    st.write(f"🏦 Handles: {record['handle_count']}")
-                    st.write(f"📊 VPAs: {record['vpas_count']}")
+        history = st.session_state['history']
+        if history:
+            # Latest five runs, newest first, numbered by their position in the full history
+            n = len(history)
+            recent = pd.DataFrame(history[-5:][::-1], index=pd.RangeIndex(n, max(n - 5, 0), -1, name='#'))
+            st.dataframe(recent.rename(columns={
+                'timestamp': '🕒 Time',
+                'phone_count': '📱 Phones',
+                'handle_count': '🏦 Handles',
+                'vpas_count': '📊 VPAs'
+            }), use_container_width=True)
         else:
             st.info("No history yet")
         
@@ -235,7 +390,7 @@ with col1:
         )
         if uploaded_file:
             content = uploaded_file.read().decode('utf-8')
-            phone_numbers = [line.strip().split(',')[0] for line in content.split('\n') if line.strip()]
+            phone_numbers = [num for num in UPLOAD_FIELD_RE.findall(content) if num and num not in PLACEHOLDER_NUMBERS]
     
     else:  # Range Generator
         st.info("Generate sequential numbers for testing")
@@ -253,8 +408,9 @@ with col1:
     
     # Validation summary
     if phone_numbers:
-        valid_numbers = [num for num in phone_numbers if validate_phone_number(num)]
-        invalid_numbers = [num for num in phone_numbers if not validate_phone_number(num)]
+        numbers_arr, valid_mask = validate_batch(phone_numbers)
+        valid_numbers = numbers_arr[valid_mask].tolist()
+        invalid_numbers = numbers_arr[~valid_mask].tolist()
         
         col_a, col_b = st.columns(2)
         col_a.metric("✅ Valid", len(valid_numbers))
@@ -307,37 +463,37 @@ with col2:
             st.error("❌ Please select at least one UPI handle")
         else:
             with st.spinner("🔄 Generating VPAs..."):
-                valid_numbers = [num for num in phone_numbers if validate_phone_number(num)]
+                # Prefix/suffix are applied when rendering, so phones stay valid 10-digit numbers
+                vpa_format = apply_affixes(custom_format, add_prefix, add_suffix)
                 
-                # Apply prefix/suffix
-                if add_prefix:
-                    valid_numbers = [add_prefix + num for num in valid_numbers]
-                if add_suffix:
-                    valid_numbers = [num + add_suffix for num in valid_numbers]
-                
-                vpas = generate_vpas(valid_numbers, selected_handles, custom_format)
-                
-                # Remove duplicates
-                if remove_duplicates:
-                    vpas = list(set(vpas))
+                # Reuse the numbers already validated for the summary above
+                phones, handles, unique_count = _gen_cached(
+                    tuple(valid_numbers), tuple(selected_handles), vpa_format, remove_duplicates
+                )
                 
                 # Sort
-                if sort_option == "By Phone Number":
-                    vpas.sort(key=lambda x: x.split('@')[0])
-                elif sort_option == "By Handle":
-                    vpas.sort(key=lambda x: x.split('@')[1] if '@' in x else x)
-                elif sort_option == "Alphabetically":
-                    vpas.sort()
+                phones, handles = sort_vpas(phones, handles, vpa_format, sort_option)
                 
-                st.session_state['vpas'] = vpas
-                st.session_state['valid_numbers'] = [num.replace(add_prefix, '').replace(add_suffix, '') for num in valid_numbers]
+                st.session_state['vpas_phone'] = phones
+                st.session_state['vpas_handle'] = handles
+                st.session_state['vpa_format'] = vpa_format
+                # Caches are shared across sessions, so each generation gets a globally unique token
+                st.session_state['vpa_token'] = uuid.uuid4().hex
+                st.session_state['unique_count'] = unique_count
+                st.session_state.pop('list_search', None)
+                st.session_state['valid_numbers'] = valid_numbers
                 
                 # Save to history
-                save_to_history(valid_numbers, selected_handles, len(vpas))
+                save_to_history(valid_numbers, selected_handles, len(phones))
 
 # Display Results
-if st.session_state['vpas']:
-    vpas = st.session_state['vpas']
+@st.fragment
+def _results_panel(handle_count):
+    """Render the generated VPAs; search, filter and copy widgets rerun only this panel"""
+    phones = st.session_state['vpas_phone']
+    handles = st.session_state['vpas_handle']
+    vpa_key = (st.session_state['vpa_token'], phones, handles, st.session_state['vpa_format'])
+    vpas = build_vpa_list(*vpa_key)
     valid_numbers = st.session_state.get('valid_numbers', [])
     
     st.markdown("---")
@@ -346,39 +502,31 @@ if st.session_state['vpas']:
     # Statistics
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("📱 Phone Numbers", len(valid_numbers))
-    col2.metric("🏦 UPI Handles", len(selected_handles))
+    col2.metric("🏦 UPI Handles", handle_count)
     col3.metric("📊 Total VPAs", len(vpas))
-    col4.metric("💾 Unique VPAs", len(set(vpas)))
+    col4.metric("💾 Unique VPAs", st.session_state.get('unique_count', len(vpas)))
     
     # Display tabs
     tab1, tab2, tab3 = st.tabs(["📋 Table View", "📝 List View", "💾 Download"])
     
     with tab1:
         # Create DataFrame
-        df_data = []
-        for vpa in vpas:
-            if '@' in vpa:
-                parts = vpa.split('@')
-                df_data.append({
-                    'Phone Number': parts[0],
-                    'UPI Handle': parts[1],
-                    'Full VPA': vpa
-                })
-        df = pd.DataFrame(df_data)
+        df = build_vpa_df(*vpa_key)
         
         # Search and filter
         search_col1, search_col2 = st.columns(2)
         with search_col1:
             search_term = st.text_input("🔍 Search VPAs:", placeholder="Enter phone or handle")
         with search_col2:
-            filter_handle = st.selectbox("Filter by Handle:", ["All"] + list(df['UPI Handle'].unique()))
+            filter_handle = st.selectbox("Filter by Handle:", ["All"] + list(df['UPI Handle'].cat.categories))
         
         # Apply filters
-        filtered_df = df.copy()
+        mask = np.ones(len(df), dtype=bool)
         if search_term:
-            filtered_df = filtered_df[filtered_df['Full VPA'].str.contains(search_term, case=False)]
+            mask &= df['Full VPA'].str.contains(search_term, case=False).to_numpy()
         if filter_handle != "All":
-            filtered_df = filtered_df[filtered_df['UPI Handle'] == filter_handle]
+            mask &= (df['UPI Handle'] == filter_handle).to_numpy()
+        filtered_df = df[mask]
         
         st.dataframe(filtered_df, use_container_width=True, height=400)
         st.info(f"Showing {len(filtered_df)} of {len(df)} VPAs")
@@ -388,7 +536,7 @@ if st.session_state['vpas']:
         
         display_vpas = vpas
         if search_list:
-            display_vpas = [vpa for vpa in vpas if search_list.lower() in vpa.lower()]
+            display_vpas = search_vpas(vpas, search_list, 'list_search')
         
         st.text_area(
             f"VPA List ({len(display_vpas)} items):",
@@ -403,65 +551,59 @@ if st.session_state['vpas']:
     
     with tab3:
         st.subheader("💾 Download Generated VPAs")
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
             # TXT Download
-            txt_data = '\n'.join(vpas)
+            txt_data = build_txt_bytes(*vpa_key)
             st.download_button(
                 label="📄 Download TXT",
                 data=txt_data,
-                file_name=f"upi_vpas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                file_name=f"upi_vpas_{ts}.txt",
                 mime="text/plain",
                 use_container_width=True
             )
         
         with col2:
             # CSV Download
-            df = pd.DataFrame([vpa.split('@') for vpa in vpas if '@' in vpa], 
-                            columns=['phone_number', 'upi_handle'])
-            df['full_vpa'] = vpas
-            csv_data = df.to_csv(index=False)
+            csv_data = build_csv_bytes(*vpa_key)
             
             st.download_button(
                 label="📊 Download CSV",
                 data=csv_data,
-                file_name=f"upi_vpas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                file_name=f"upi_vpas_{ts}.csv",
                 mime="text/csv",
                 use_container_width=True
             )
         
         with col3:
             # Excel Download
-            excel_buffer = BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='VPAs')
-            excel_buffer.seek(0)
+            excel_data = build_excel_bytes(*vpa_key)
             
             st.download_button(
                 label="📑 Download Excel",
-                data=excel_buffer,
-                file_name=f"upi_vpas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                data=excel_data,
+                file_name=f"upi_vpas_{ts}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True
             )
         
         # JSON Download
-        json_data = json.dumps({
-            'generated_at': datetime.now().isoformat(),
-            'total_vpas': len(vpas),
-            'vpas': vpas
-        }, indent=2)
+        json_data = build_json_bytes(*vpa_key)
         
         st.download_button(
             label="📦 Download JSON",
             data=json_data,
-            file_name=f"upi_vpas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            file_name=f"upi_vpas_{ts}.json",
             mime="application/json",
             use_container_width=True
         )
 
+if len(st.session_state['vpas_phone']):
+    _results_panel(len(selected_handles))
+
 # Footer
 st.markdown("---")
 st.markdown("""